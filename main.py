@@ -1,7 +1,13 @@
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
+import os
+from contextlib import asynccontextmanager
+
+import orjson
+from anyio import to_thread
+from fastapi import FastAPI, HTTPException, Response, status
+from fastapi.responses import ORJSONResponse
 from typing import List
 
+from middleware import PRODUCTS_PATH, ProductsETagMiddleware, products_etag
 from models import (
     Product,
     AddToCartRequest,
@@ -14,21 +20,53 @@ from models import (
 import services
 
 
+# Worker threads for sync work FastAPI offloads (sync dependencies, file
+# responses). Route handlers are async, so this only needs to cover bursts,
+# not one thread per in-flight request.
+THREADPOOL_SIZE = min((os.cpu_count() or 1) * 2, 64)
+
+# Connections served at once before uvicorn answers 503, and the listen
+# backlog of not-yet-accepted connections. Bounding both makes overload
+# fail fast instead of queueing requests until tail latency blows up.
+MAX_CONCURRENCY = 512
+BACKLOG = 1024
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The limiter belongs to the running event loop, so size it at startup
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+
+
 app = FastAPI(
     title="E-Commerce API",
     description="High-performance RESTful API for product inventory and shopping cart management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson encodes every JSON response instead of the stdlib json module
+    default_response_class=ORJSONResponse
 )
+app.add_middleware(ProductsETagMiddleware)
 
 
-@app.get("/api/products", response_model=List[Product])
-def get_products():
+@app.get(PRODUCTS_PATH, response_model=List[Product])
+async def get_products():
     """
     Retrieve all products with ID, Name, Price, and current Stock Quantity.
+    
+    The serialized list is cached until stock changes and returned as-is,
+    skipping response-model validation. The ETag identifies the snapshot
+    within this process (boot nonce + inventory version) and is built by
+    the same products_etag that ProductsETagMiddleware compares against.
     """
     try:
-        products = services.get_all_products()
-        return products
+        version, body = services.get_products_json()
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"ETag": products_etag(version)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -37,51 +75,55 @@ def get_products():
 
 
 @app.post("/api/cart/add", response_model=SuccessResponse)
-def add_to_cart(request: AddToCartRequest):
+async def add_to_cart(request: AddToCartRequest):
     """
     Add an item to the cart.
     If product already exists in cart, increases quantity (idempotent).
     Validates stock availability before adding.
     """
     try:
-        result = services.add_to_cart(request.productId, request.quantity)
-        return result
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+        ok, result = services.add_to_cart(request.productId, request.quantity)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+    
+    if not ok:
+        # Rejections are answered directly, same body as HTTPException
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"detail": result}
+        )
+    return result
 
 
 @app.patch("/api/cart/update", response_model=SuccessResponse)
-def update_cart(request: UpdateCartRequest):
+async def update_cart(request: UpdateCartRequest):
     """
     Update item quantity in the cart to the specified amount.
     Set quantity to 0 to remove item from cart.
     Validates stock availability before updating.
     """
     try:
-        result = services.update_cart(request.productId, request.quantity)
-        return result
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+        ok, result = services.update_cart(request.productId, request.quantity)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+    
+    if not ok:
+        # Rejections are answered directly, same body as HTTPException
+        return ORJSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"detail": result}
+        )
+    return result
 
 
 @app.get("/api/cart", response_model=CartResponse)
-def get_cart():
+async def get_cart():
     """
     View cart contents including:
     - List of items with product details and subtotals
@@ -99,7 +141,7 @@ def get_cart():
 
 
 @app.post("/api/cart/checkout", response_model=CheckoutResponse)
-def checkout():
+async def checkout():
     """
     Finalize the order with atomic stock validation and inventory update.
     
@@ -126,22 +168,38 @@ def checkout():
 
 
 # Optional: Root endpoint for API info
+# The payload never changes, so it is serialized once at import
+_ROOT_BODY = orjson.dumps({
+    "message": "E-Commerce API",
+    "version": "1.0.0",
+    "endpoints": {
+        "products": "/api/products",
+        "cart_add": "/api/cart/add",
+        "cart_update": "/api/cart/update",
+        "cart_view": "/api/cart",
+        "checkout": "/api/cart/checkout"
+    }
+})
+
+
 @app.get("/")
-def root():
+async def root():
     """API root endpoint with basic information."""
-    return {
-        "message": "E-Commerce API",
-        "version": "1.0.0",
-        "endpoints": {
-            "products": "/api/products",
-            "cart_add": "/api/cart/add",
-            "cart_update": "/api/cart/update",
-            "cart_view": "/api/cart",
-            "checkout": "/api/cart/checkout"
-        }
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Cart and inventory live in this process's memory, so the app must run
+    # as a single worker; uvloop and httptools speed up its one event loop.
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        workers=1,
+        loop="uvloop",
+        http="httptools",
+        limit_concurrency=MAX_CONCURRENCY,
+        backlog=BACKLOG,
+        log_level="warning"
+    )
@@ -0,0 +1,59 @@
+from typing import List
+from uuid import uuid4
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import services
+
+
+PRODUCTS_PATH = "/api/products"
+
+# Per-process nonce for product ETags. inventory_version restarts at 0 in
+# every process while real stock has moved on, so a bare version number
+# could match a tag a client cached before a restart or reload.
+_BOOT_ID = uuid4().hex
+
+
+def products_etag(version: int) -> str:
+    """ETag for the product list at the given inventory version."""
+    return f'"{_BOOT_ID}-{version}"'
+
+
+def _if_none_match_tags(scope: Scope) -> List[bytes]:
+    """Entity tags from the If-None-Match header, compared weakly (W/ dropped)."""
+    for name, value in scope["headers"]:
+        if name == b"if-none-match":
+            return [tag.strip().removeprefix(b"W/") for tag in value.split(b",")]
+    return []
+
+
+class ProductsETagMiddleware:
+    """
+    Answer conditional GET /api/products with 304 Not Modified.
+    
+    Pollers that send back the ETag of the current inventory version get an
+    empty 304 before routing, so no request parsing or JSON work happens.
+    Plain ASGI rather than BaseHTTPMiddleware so other routes pay nothing.
+    """
+    
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and scope["path"] == PRODUCTS_PATH
+        ):
+            etag = products_etag(services.inventory_version).encode("ascii")
+            tags = _if_none_match_tags(scope)
+            if etag in tags or b"*" in tags:
+                await send({
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [(b"etag", etag)]
+                })
+                await send({"type": "http.response.body", "body": b""})
+                return
+        
+        await self.app(scope, receive, send)
@@ -1,15 +1,22 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import List
 
 
 class Product(BaseModel):
-    """Product model for inventory."""
+    """Product model for inventory (immutable snapshot)."""
+    model_config = ConfigDict(frozen=True)
+    
     id: int
     name: str
     price: float
     stock: int
 
 
+# Built once at import so validating/serializing a product list reuses the
+# compiled pydantic-core schema instead of rebuilding it per call
+ProductListAdapter = TypeAdapter(List[Product])
+
+
 class AddToCartRequest(BaseModel):
     """Request model for adding items to cart."""
     productId: int = Field(..., description="Product ID to add to cart")
@@ -1,210 +1,328 @@
 from threading import Lock
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
+
+from models import (
+    CartItem,
+    CartResponse,
+    CheckoutResponse,
+    ProductListAdapter,
+    SuccessResponse
+)
 
 
 # In-memory data stores
-products_db: Dict[int, Dict] = {
-    101: {"id": 101, "name": "Laptop Charger", "price": 75.00, "stock": 5},
-    102: {"id": 102, "name": "Wireless Mouse", "price": 25.00, "stock": 10},
-    103: {"id": 103, "name": "USB-C Hub", "price": 40.00, "stock": 2},
-    104: {"id": 104, "name": "Monitor Stand", "price": 50.00, "stock": 15},
-}
+# The catalog is laid out as parallel columns (structure of arrays): row i
+# of every column describes one product. Reads that only need prices or
+# stock scan one flat list instead of chasing a dict per product, and the
+# stock column that checkout decrements is kept apart from the read-only
+# name/price columns every reader shares.
+#
+# Prices are integer cents so all cart/order arithmetic is exact integer
+# math; they are converted to dollars only when building a response.
+product_ids: List[int] = [101, 102, 103, 104]
+product_names: List[str] = ["Laptop Charger", "Wireless Mouse", "USB-C Hub", "Monitor Stand"]
+product_price_cents: List[int] = [7500, 2500, 4000, 5000]
+product_stock: List[int] = [5, 10, 2, 15]
+
+# Row lookup: {product_id: row index into the catalog columns}
+product_index: Dict[int, int] = {product_id: row for row, product_id in enumerate(product_ids)}
+
+# Immutable (id, name, price in dollars) per catalog row, built once at
+# startup so product listings only pair them with the current stock
+_product_rows: Tuple[Tuple[int, str, float], ...] = tuple(
+    (product_id, name, price_cents / 100)
+    for product_id, name, price_cents in zip(product_ids, product_names, product_price_cents)
+)
+
+
+class Cart:
+    """Cart storage with running totals, kept current on every mutation."""
+    
+    __slots__ = ("lines", "total_items", "total_cents")
+    
+    def __init__(self) -> None:
+        # {product_id: (quantity, catalog row)}. Caching the row means cart
+        # reads and checkout never look the product up again.
+        self.lines: Dict[int, Tuple[int, int]] = {}
+        self.total_items = 0
+        self.total_cents = 0
+    
+    def __bool__(self) -> bool:
+        return bool(self.lines)
+    
+    def quantity(self, product_id: int) -> int:
+        """Quantity of product_id in the cart (0 if absent)."""
+        line = self.lines.get(product_id)
+        return line[0] if line is not None else 0
+    
+    def set_quantity(self, product_id: int, quantity: int, row: int) -> None:
+        """Set product_id's quantity (0 removes it), adjusting totals by the delta."""
+        delta = quantity - self.quantity(product_id)
+        if quantity:
+            self.lines[product_id] = (quantity, row)
+        else:
+            del self.lines[product_id]
+        
+        self.total_items += delta
+        self.total_cents += delta * product_price_cents[row]
+    
+    def clear(self) -> None:
+        """Empty the cart and reset its totals."""
+        self.lines.clear()
+        self.total_items = 0
+        self.total_cents = 0
+
 
-# Cart storage: {product_id: quantity}
-cart_db: Dict[int, int] = {}
+cart_db = Cart()
 
-# Thread lock for thread-safe operations
-inventory_lock = Lock()
+# Bumped whenever stock changes; identifies a snapshot of the product list
+inventory_version: int = 0
+
+# Serialized product list as (inventory_version, JSON bytes), rebuilt lazily
+# on the first read after stock changes
+_products_cache: Optional[Tuple[int, bytes]] = None
+
+# Thread lock for thread-safe operations.
+# Writers hold cart_lock for their whole check-then-act on stock/cart. Every
+# write touches the single shared cart, so this one lock serializes all
+# writers, stock updates included.
+#
+# Product reads are lock-free: checkout publishes its stock decrements with
+# one slice assignment and readers copy the column with one slice. Both run
+# in C without releasing the GIL, so a reader sees either all or none of a
+# checkout's decrements. Cart reads hold cart_lock just long
+# enough to copy the items together with their running totals.
+cart_lock = Lock()
 
 
 def get_all_products() -> List[Dict]:
-    """Retrieve all products with current stock information."""
-    with inventory_lock:
-        return list(products_db.values())
+    """Retrieve all products with current stock information (lock-free read)."""
+    # Snapshot stock in one C-level copy before the Python-level loop, where
+    # a thread switch could otherwise land mid-checkout
+    stock_snapshot = product_stock[:]
+    return [
+        {"id": product_id, "name": name, "price": price, "stock": stock}
+        for (product_id, name, price), stock in zip(_product_rows, stock_snapshot)
+    ]
 
 
-def add_to_cart(product_id: int, quantity: int) -> Dict:
+def get_products_json() -> Tuple[int, bytes]:
+    """
+    Get the product list serialized as JSON, reusing the cached bytes
+    until the next stock change.
+    
+    Returns: (inventory_version, JSON bytes)
+    """
+    global _products_cache
+    
+    cached = _products_cache
+    if cached is not None and cached[0] == inventory_version:
+        return cached
+    
+    # Tag with the version read *before* the snapshot: if checkout commits
+    # mid-build, the entry is already stale and the next read rebuilds it
+    version = inventory_version
+    products = ProductListAdapter.validate_python(get_all_products())
+    body = ProductListAdapter.dump_json(products)
+    cached = (version, body)
+    _products_cache = cached
+    return cached
+
+
+# Outcome of a cart mutation. Rejections (unknown product, not enough stock)
+# are ordinary results rather than exceptions, so a burst of failing requests
+# doesn't pay for raising and unwinding on every call.
+CartResult = Tuple[bool, Union[SuccessResponse, str]]
+
+
+def add_to_cart(product_id: int, quantity: int) -> CartResult:
     """
     Add item to cart (idempotent - increases quantity if exists).
     Validates stock availability before adding.
     
-    Returns: {"success": True, "message": str} or raises ValueError
+    Returns: (True, SuccessResponse) or (False, error message)
     """
     if quantity <= 0:
-        raise ValueError("Quantity must be greater than 0")
+        return False, "Quantity must be greater than 0"
     
-    with inventory_lock:
-        # Check if product exists
-        if product_id not in products_db:
-            raise ValueError(f"Product with ID {product_id} not found")
-        
-        product = products_db[product_id]
-        current_cart_quantity = cart_db.get(product_id, 0)
+    # Check if product exists (the catalog itself is never resized)
+    row = product_index.get(product_id)
+    if row is None:
+        return False, f"Product with ID {product_id} not found"
+    
+    name = product_names[row]
+    
+    with cart_lock:
+        current_cart_quantity = cart_db.quantity(product_id)
         new_total_quantity = current_cart_quantity + quantity
         
         # Validate stock availability
-        if new_total_quantity > product["stock"]:
-            raise ValueError(
-                f"Insufficient stock for {product['name']}. "
-                f"Available: {product['stock']}, Requested: {new_total_quantity}"
+        stock = product_stock[row]
+        if new_total_quantity > stock:
+            return False, (
+                f"Insufficient stock for {name}. "
+                f"Available: {stock}, Requested: {new_total_quantity}"
             )
         
         # Add/update cart (idempotent)
-        cart_db[product_id] = new_total_quantity
+        cart_db.set_quantity(product_id, new_total_quantity, row)
         
-        return {
-            "success": True,
-            "message": f"Added {quantity} x {product['name']} to cart"
-        }
+        return True, SuccessResponse.model_construct(
+            success=True,
+            message=f"Added {quantity} x {name} to cart"
+        )
 
 
-def update_cart(product_id: int, quantity: int) -> Dict:
+def update_cart(product_id: int, quantity: int) -> CartResult:
     """
     Update item quantity in cart to specified amount.
     If quantity is 0, removes item from cart.
     
-    Returns: {"success": True, "message": str} or raises ValueError
+    Returns: (True, SuccessResponse) or (False, error message)
     """
     if quantity < 0:
-        raise ValueError("Quantity cannot be negative")
+        return False, "Quantity cannot be negative"
     
-    with inventory_lock:
-        # Check if product exists in inventory
-        if product_id not in products_db:
-            #same as if 'key' in hashmap/dict
-            raise ValueError(f"Product with ID {product_id} not found")
-        
+    # Check if product exists in inventory (one hash probe via .get)
+    row = product_index.get(product_id)
+    if row is None:
+        return False, f"Product with ID {product_id} not found"
+    
+    name = product_names[row]
+    
+    with cart_lock:
         # Check if product exists in cart
-        if product_id not in cart_db:
-            raise ValueError(f"Product with ID {product_id} not in cart")
-        
-        product = products_db[product_id]
+        if product_id not in cart_db.lines:
+            return False, f"Product with ID {product_id} not in cart"
         
         # If quantity is 0, remove from cart
         if quantity == 0:
-            del cart_db[product_id]
-            return {
-                "success": True,
-                "message": f"Removed {product['name']} from cart"
-            }
+            cart_db.set_quantity(product_id, 0, row)
+            return True, SuccessResponse.model_construct(
+                success=True,
+                message=f"Removed {name} from cart"
+            )
         
         # Validate stock availability
-        if quantity > product["stock"]:
-            raise ValueError(
-                f"Insufficient stock for {product['name']}. "
-                f"Available: {product['stock']}, Requested: {quantity}"
+        stock = product_stock[row]
+        if quantity > stock:
+            return False, (
+                f"Insufficient stock for {name}. "
+                f"Available: {stock}, Requested: {quantity}"
             )
         
         # Update cart
-        cart_db[product_id] = quantity
+        cart_db.set_quantity(product_id, quantity, row)
         
-        return {
-            "success": True,
-            "message": f"Updated {product['name']} quantity to {quantity}"
-        }
+        return True, SuccessResponse.model_construct(
+            success=True,
+            message=f"Updated {name} quantity to {quantity}"
+        )
 
 
-def get_cart() -> Dict:
+def get_cart() -> CartResponse:
     """
-    Get cart contents with calculated totals.
+    Get cart contents with running totals.
     
-    Returns: {
-        "items": [...],
-        "total_items": int,
-        "total_price": float
-    }
+    Returns: CartResponse
     """
-    with inventory_lock:
-        items = []
-        total_items = 0
-        total_price = 0.0
-        
-        for product_id, quantity in cart_db.items():
-            if product_id in products_db:
-                product = products_db[product_id]
-                subtotal = product["price"] * quantity
-                
-                items.append({
-                    "product_id": product_id,
-                    "name": product["name"],
-                    "price": product["price"],
-                    "quantity": quantity,
-                    "subtotal": subtotal
-                })
-                
-                total_items += quantity
-                total_price += subtotal
-        
-        return {
-            "items": items,
-            "total_items": total_items,
-            "total_price": round(total_price, 2)
-        }
+    # Copy the items together with their running totals so the totals
+    # always describe the items returned
+    with cart_lock:
+        cart_snapshot = list(cart_db.lines.items())
+        total_items = cart_db.total_items
+        total_cents = cart_db.total_cents
+    
+    items = []
+    for product_id, (quantity, row) in cart_snapshot:
+        price_cents = product_price_cents[row]
+        
+        items.append(CartItem.model_construct(
+            product_id=product_id,
+            name=product_names[row],
+            price=price_cents / 100,
+            quantity=quantity,
+            subtotal=price_cents * quantity / 100
+        ))
+    
+    return CartResponse.model_construct(
+        items=items,
+        total_items=total_items,
+        total_price=total_cents / 100
+    )
 
 
-def checkout() -> Dict:
+def _checkout_failure_message() -> str:
+    """Describe every cart item that fails checkout validation (cart lock held)."""
+    validation_errors = []
+    for quantity, row in cart_db.lines.values():
+        stock = product_stock[row]
+        if quantity > stock:
+            validation_errors.append(
+                f"{product_names[row]}: Insufficient stock "
+                f"(Available: {stock}, Requested: {quantity})"
+            )
+    
+    return "Checkout failed: " + "; ".join(validation_errors)
+
+
+def checkout() -> CheckoutResponse:
     """
     Finalize order with atomic stock validation and update.
     All-or-nothing: if any item has insufficient stock, entire checkout fails.
     
-    Returns: {
-        "success": True,
-        "message": str,
-        "order_summary": {...}
-    } or raises ValueError
+    Returns: CheckoutResponse or raises ValueError
     """
-    with inventory_lock:
+    global inventory_version
+    
+    with cart_lock:
         if not cart_db:
             raise ValueError("Cart is empty")
         
-        # Phase 1: Validate all items have sufficient stock
-        validation_errors = []
-        for product_id, quantity in cart_db.items():
-            if product_id not in products_db:
-                validation_errors.append(f"Product ID {product_id} not found")
-                continue
-            
-            product = products_db[product_id]
-            if quantity > product["stock"]:
-                validation_errors.append(
-                    f"{product['name']}: Insufficient stock "
-                    f"(Available: {product['stock']}, Requested: {quantity})"
-                )
-        
-        # If any validation fails, abort entire checkout
-        if validation_errors:
-            raise ValueError("Checkout failed: " + "; ".join(validation_errors))
-        
-        # Phase 2: All validations passed - commit changes atomically
+        # Phase 1: Check every item's stock. Stops at the first failure;
+        # error messages are only built once we know the checkout is rejected.
+        for quantity, row in cart_db.lines.values():
+            if quantity > product_stock[row]:
+                raise ValueError(_checkout_failure_message())
+        
+        # Phase 2: All validations passed - commit changes atomically.
+        # The order totals are the cart's running totals; no per-item sum.
         order_items = []
-        total_price = 0.0
+        new_stock = product_stock[:]
         
-        for product_id, quantity in cart_db.items():
-            product = products_db[product_id]
-            subtotal = product["price"] * quantity
+        for product_id, (quantity, row) in cart_db.lines.items():
+            price_cents = product_price_cents[row]
+            subtotal_cents = price_cents * quantity
             
-            # Deduct stock
-            products_db[product_id]["stock"] -= quantity
+            # Deduct stock (published below, all at once)
+            new_stock[row] -= quantity
             
             order_items.append({
                 "product_id": product_id,
-                "name": product["name"],
-                "price": product["price"],
+                "name": product_names[row],
+                "price": price_cents / 100,
                 "quantity": quantity,
-                "subtotal": subtotal
+                "subtotal": subtotal_cents / 100
             })
-            
-            total_price += subtotal
+        
+        # One C-level slice assignment, so lock-free readers see either all
+        # or none of this order's decrements
+        product_stock[:] = new_stock
+        
+        # Stock changed: invalidate cached product listings
+        inventory_version += 1
+        
+        order_summary = {
+            "items": order_items,
+            "total_items": cart_db.total_items,
+            "total_price": cart_db.total_cents / 100
+        }
         
         # Clear cart after successful checkout
         cart_db.clear()
         
-        return {
-            "success": True,
-            "message": "Order placed successfully",
-            "order_summary": {
-                "items": order_items,
-                "total_items": sum(item["quantity"] for item in order_items),
-                "total_price": round(total_price, 2)
-            }
-        }
+        return CheckoutResponse.model_construct(
+            success=True,
+            message="Order placed successfully",
+            order_summary=order_summary
+        )
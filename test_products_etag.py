@@ -0,0 +1,76 @@
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import middleware
+import services
+
+
+client = TestClient(main.app)
+
+
+@pytest.fixture(autouse=True)
+def fresh_inventory(monkeypatch):
+    """Run every test against the seed stock with an empty cart and no cache."""
+    seed_stock = services.product_stock[:]
+    monkeypatch.setattr(services, "inventory_version", 0)
+    monkeypatch.setattr(services, "_products_cache", None)
+    services.cart_db.clear()
+    
+    yield
+    
+    services.product_stock[:] = seed_stock
+    services.cart_db.clear()
+
+
+def test_current_tag_gets_304():
+    etag = client.get("/api/products").headers["etag"]
+    
+    response = client.get("/api/products", headers={"If-None-Match": etag})
+    
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_tag_from_before_restart_does_not_match(monkeypatch):
+    old_etag = client.get("/api/products").headers["etag"]
+    
+    # A restarted process gets a new boot ID while inventory_version starts
+    # over, so it can reach the same version number with different stock
+    monkeypatch.setattr(middleware, "_BOOT_ID", uuid4().hex)
+    response = client.get("/api/products", headers={"If-None-Match": old_etag})
+    
+    assert response.status_code == 200
+    assert response.headers["etag"] != old_etag
+
+
+def test_tag_is_stable_within_a_version_and_moves_with_it(monkeypatch):
+    etag = client.get("/api/products").headers["etag"]
+    
+    assert client.get("/api/products").headers["etag"] == etag
+    
+    monkeypatch.setattr(services, "inventory_version", services.inventory_version + 1)
+    refreshed = client.get("/api/products", headers={"If-None-Match": etag})
+    
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+
+
+def test_checkout_refreshes_listing_and_tag():
+    before = client.get("/api/products")
+    stock_before = {product["id"]: product["stock"] for product in before.json()}
+    
+    assert client.post("/api/cart/add", json={"productId": 101, "quantity": 2}).status_code == 200
+    assert client.post("/api/cart/checkout").status_code == 200
+    after = client.get("/api/products", headers={"If-None-Match": before.headers["etag"]})
+    
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    stock_after = {product["id"]: product["stock"] for product in after.json()}
+    assert stock_after[101] == stock_before[101] - 2
+    
+    # The fresh tag short-circuits again until the next stock change
+    repeat = client.get("/api/products", headers={"If-None-Match": after.headers["etag"]})
+    assert repeat.status_code == 304